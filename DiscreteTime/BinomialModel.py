@@ -1,7 +1,8 @@
 import numpy as np
 
 from DiscreteTime.ReplicatingPortfolio import ReplicatingPortfolio
-from Options.FinancialOption import CallOption
+from OptionPricing.BSOptionPricer import BSCallOptionPricer, BSPutOptionPricer
+from Options.FinancialOption import CallOption, PutOption
 
 
 class BinomialNode:
@@ -116,7 +117,88 @@ class MultiPeriodBinomialModel:
         self.D = D
         self.S0 = S0
         self.Beta = Beta
-        self.root = self.build_node(S0, 0)
+        self._root = None
+
+        # set by the from_crr / from_leisen_reimer constructors
+        self.sigma = None
+        self.r = None
+        self.maturity = None
+        self.parameterisation = None
+        self.K = None
+
+    @classmethod
+    def from_crr(cls, S0, sigma, r, T, steps):
+        """
+        Builds a Cox-Ross-Rubinstein model
+        u = exp(sigma sqrt(dt)), d = 1 / u, beta = exp(r dt)
+        :param S0: Initial stock price
+        :param sigma: volatility
+        :param r: interest rate
+        :param T: time to maturity
+        :param steps: number of timesteps
+        :return: the model
+        """
+        dt = T / steps
+        u = np.exp(sigma * np.sqrt(dt))
+        beta = np.exp(r * dt)
+
+        model = cls(np.full(steps, u), np.full(steps, 1 / u), S0, np.full(steps, beta))
+        model.sigma, model.r, model.maturity = sigma, r, T
+        model.parameterisation = "crr"
+        return model
+
+    @classmethod
+    def from_leisen_reimer(cls, S0, sigma, r, T, steps, K):
+        """
+        Builds a Leisen-Reimer model, the tree is centred on the strike price so K must be a scalar
+        steps is rounded up to the next odd number
+        :param S0: Initial stock price
+        :param sigma: volatility
+        :param r: interest rate
+        :param T: time to maturity
+        :param steps: number of timesteps
+        :param K: strike price
+        :return: the model
+        """
+        assert np.ndim(K) == 0
+        steps = steps | 1
+        dt = T / steps
+        beta = np.exp(r * dt)
+
+        d1 = (np.log(S0 / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+        d2 = d1 - sigma * np.sqrt(T)
+        p = cls.peizer_pratt(d2, steps)
+        p_star = cls.peizer_pratt(d1, steps)
+
+        u = beta * p_star / p
+        d = (beta - p * u) / (1 - p)
+
+        model = cls(np.full(steps, u), np.full(steps, d), S0, np.full(steps, beta))
+        model.sigma, model.r, model.maturity = sigma, r, T
+        model.parameterisation = "leisen_reimer"
+        model.K = K
+        return model
+
+    @staticmethod
+    def peizer_pratt(z, n):
+        """
+        Peizer-Pratt (method 2) inversion of the normal cdf onto a binomial probability
+        :param z: the normal quantile
+        :param n: number of timesteps
+        :return: h(z)
+        """
+        x = z / (n + 1 / 3 + 0.1 / (n + 1))
+        return 0.5 + np.sign(z) * 0.5 * np.sqrt(1 - np.exp(-x ** 2 * (n + 1 / 6)))
+
+    @property
+    def root(self):
+        """
+        The root node, the tree has 2^T leaves so it is only built when first needed
+        :return: the root node
+        """
+        if self._root is None:
+            self._root = self.build_node(self.S0, 0)
+        return self._root
 
     def build_node(self, S, layer):
         """
@@ -162,6 +244,90 @@ class MultiPeriodBinomialModel:
         Cd = self.price_node_by_emm(option, node.d)
         return node.price_option_by_emm(Cu, Cd)
 
+    def price_option_by_lattice(self, option, smoothed=False):
+        """
+        Prices an option by backward induction over the recombining lattice
+        Only needs T + 1 nodes per timestep, so U, D and Beta must be constant
+        :param option: option to price
+        :param smoothed: replace the last timestep with the BS price (requires from_crr)
+        :return: C0
+        """
+        U, D, Beta = np.asarray(self.U), np.asarray(self.D), np.asarray(self.Beta)
+        assert np.all(U == U[0]) and np.all(D == D[0]) and np.all(Beta == Beta[0])
+        self.check_option(option)
+        u, d, b = U[0], D[0], Beta[0]
+        p = (b - d) / (u - d)
+
+        # S at layer n with j up moves is S0 u^j d^(n - j), ordered by j
+        steps = self.T - 1 if smoothed else self.T
+        j = np.arange(steps + 1)
+        S = self.S0 * u ** j * d ** (steps - j)
+
+        if smoothed:
+            assert self.parameterisation == "crr"
+            C = self.bs_price(option, S, self.maturity / self.T)
+        else:
+            C = option.get_option_payoff(S)
+
+        for _ in range(steps):
+            C = (p * C[..., 1:] + (1 - p) * C[..., :-1]) / b
+
+        # one price per strike if K is an array
+        return C[:, 0] if C.ndim > 1 else C[0]
+
+    def check_option(self, option):
+        """
+        A model built by from_crr / from_leisen_reimer only prices options with its own maturity and volatility,
+        and a Leisen-Reimer tree is only accurate for the strike it was built for
+        :param option: option to price
+        :return: None
+        """
+        if self.parameterisation is not None:
+            assert option.T == self.maturity, "model was built for a different maturity"
+            assert option.sigma == self.sigma, "model was built for a different volatility"
+
+        if self.parameterisation == "leisen_reimer":
+            assert np.ndim(option.K) == 0 and option.K == self.K, "Leisen-Reimer tree was built for a different strike"
+
+    def bs_price(self, option, S, dt):
+        """
+        Prices the option with the BS formula with dt to maturity
+        :param option: option to price
+        :param S: array of stock prices
+        :param dt: time to maturity
+        :return: option values, (K.size, S.size) if K is an array
+        """
+        _, K, _ = option.get_params()
+        K = np.asarray(K)[..., np.newaxis] if np.ndim(K) else K
+        short_option = type(option)(dt, K, self.sigma)
+
+        pricer = BSPutOptionPricer() if isinstance(option, PutOption) else BSCallOptionPricer()
+        return pricer.price(0, S, self.r, short_option)
+
+    def price_option_by_richardson(self, option):
+        """
+        Prices an option with Richardson extrapolation between this model and one with half the timesteps
+        CRR is BS smoothed so its error is O(1/T), Leisen-Reimer error is O(1/T^2)
+        C0 = (T^k C(T) - t^k C(t)) / (T^k - t^k)
+        :param option: option to price
+        :return: C0
+        """
+        assert self.parameterisation is not None
+        assert self.T // 2 > 0, "Richardson extrapolation needs at least 2 timesteps"
+        if self.parameterisation == "crr":
+            coarse = self.from_crr(self.S0, self.sigma, self.r, self.maturity, self.T // 2)
+            smoothed, k = True, 1
+        else:
+            coarse = self.from_leisen_reimer(self.S0, self.sigma, self.r, self.maturity, self.T // 2, self.K)
+            smoothed, k = False, 2
+        assert coarse.T < self.T, "Richardson extrapolation needs the coarse model to have fewer timesteps"
+
+        fine_price = self.price_option_by_lattice(option, smoothed)
+        coarse_price = coarse.price_option_by_lattice(option, smoothed)
+
+        n, m = self.T ** k, coarse.T ** k
+        return (n * fine_price - m * coarse_price) / (n - m)
+
     def price_option_by_replication(self, option):
         """
         Prices an option recursively using replication
@@ -263,3 +429,19 @@ if __name__ == "__main__":
     print(f"(a2ud, b2ud) : ({(a2ud.round(2)[0])}, {(b2ud.round(2)[0])})")
     print(f"(a2du, b2du) : ({(a2du.round(2)[0])}, {(b2du.round(2)[0])})")
     print(f"(a2dd, b2dd) : ({(a2dd.round(2)[0])}, {(b2dd.round(2)[0])})")
+
+    S0 = 100.0
+    K = 105.0
+    r = 0.05
+    T = 1
+    callOption = CallOption(T, K, sigma)
+    bs_price = BSCallOptionPricer().price(0, S0, r, callOption)
+    print(f"BS price: ${round(bs_price, 4)}")
+
+    for steps in [25, 50, 100, 1000]:
+        crr = MultiPeriodBinomialModel.from_crr(S0, sigma, r, T, steps)
+        lr = MultiPeriodBinomialModel.from_leisen_reimer(S0, sigma, r, T, steps, K)
+        print(f"{steps} steps - CRR: ${round(crr.price_option_by_lattice(callOption), 4)}, "
+              f"CRR smoothed + richardson: ${round(crr.price_option_by_richardson(callOption), 4)}, "
+              f"LR: ${round(lr.price_option_by_lattice(callOption), 4)}, "
+              f"LR + richardson: ${round(lr.price_option_by_richardson(callOption), 4)}")
@@ -41,3 +41,20 @@ class FinancialModel:
         :return: time intervals, list of paths
         """
         pass
+
+    def generate_terminal(self, n, t, dt, out=None, rng=None):
+        """
+        Generates the final value of random paths from the model
+        :param n: number of paths to generate
+        :param t: time to generate samples for
+        :param dt: delta in time
+        :param out: array to write the values into (optional)
+        :param rng: numpy Generator to sample with, models that don't support it use np.random
+        :return: final value of each path
+        """
+        self.generate_paths(n, t, dt)
+        if out is None:
+            return self.path[-1, :]
+
+        out[:] = self.path[-1, :]
+        return out
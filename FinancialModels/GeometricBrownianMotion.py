@@ -44,6 +44,38 @@ class GBM(FinancialModel):
 
         return self.path
 
+    def generate_terminal(self, n, time, dt, out=None, rng=None):
+        """
+        Samples the final value of the paths directly, St = s0 exp((a - 0.5 b^2)t + b sqrt(t) Z)
+        t is the last time interval of generate_paths() so the distribution is the same
+        :param n: number of paths to generate
+        :param time: time to generate samples for
+        :param dt: delta in time
+        :param out: array to write the values into, its dtype is the working precision (optional)
+        :param rng: numpy Generator to sample with (straight into out if given), otherwise samples with np.random
+        :return: final value of each path
+        """
+        t = (np.ceil(time / dt) - 1) * dt
+
+        if rng is None:
+            Z = np.random.normal(size=n)
+            if out is None:
+                out = Z
+            else:
+                out[:] = Z
+        elif out is None:
+            out = rng.standard_normal(n)
+        else:
+            rng.standard_normal(out=out, dtype=out.dtype)
+
+        # St = s0 exp((a - 0.5 b^2)t + b sqrt(t) Z), in place
+        out *= self.sigma * np.sqrt(t)
+        out += (self.mu - (self.sigma ** 2 / 2)) * t
+        np.exp(out, out=out)
+        out *= self.s0
+
+        return out
+
 
 if __name__ == "__main__":
     bm = GBM(0.3, 0.4, 40)
@@ -0,0 +1,191 @@
+import numpy as np
+
+from FinancialModels.FinancialModel import FinancialModel
+
+
+class Heston(FinancialModel):
+    """
+    A Heston stochastic volatility model
+    dSt = mu St dt + sqrt(Vt) St dBt
+    dVt = kappa (theta - Vt) dt + xi sqrt(Vt) dWt,  dBt dWt = rho dt
+    Simulated with Andersen's quadratic-exponential (QE) scheme, vectorized across paths
+    """
+
+    def __init__(self, mu, kappa, theta, xi, rho, v0, s0=1, psi_c=1.5, chunk_size=10000):
+        """
+        Initialises the Heston model
+        :param mu: the drift coefficient
+        :param kappa: the mean reversion speed of the variance
+        :param theta: the long run variance
+        :param xi: the volatility of the variance
+        :param rho: the correlation between the stock and variance brownian motions
+        :param v0: the initial variance
+        :param s0: the initial stock price
+        :param psi_c: QE switching threshold between the quadratic and exponential schemes
+        :param chunk_size: max number of paths simulated at once when only keeping terminal values
+        """
+        assert kappa > 0 and theta > 0 and xi > 0 and v0 >= 0 and -1 <= rho <= 1
+        super().__init__(y_name="St")
+        self.mu = mu
+        self.kappa = kappa
+        self.theta = theta
+        self.xi = xi
+        self.rho = rho
+        self.v0 = v0
+        self.s0 = s0
+        self.psi_c = psi_c
+        self.chunk_size = chunk_size
+        self.variance_path = None
+
+    def get_time_intervals(self, time, dt):
+        """
+        :param time: time to generate samples for
+        :param dt: delta in time
+        :return: time intervals from 0 to time inclusive
+        """
+        steps = max(int(round(time / dt)), 1)
+        return np.linspace(0, time, steps + 1)
+
+    def step_variance(self, V, dt, rng=None):
+        """
+        Advances the variance one timestep with the QE scheme
+        :param V: variance at time t (array, 1 for each path)
+        :param dt: delta in time
+        :param rng: numpy Generator to sample with, otherwise samples with np.random
+        :return: variance at time t + dt
+        """
+        e = np.exp(-self.kappa * dt)
+
+        # conditional mean and variance of V(t + dt)
+        m = self.theta + (V - self.theta) * e
+        s2 = V * self.xi ** 2 * e * (1 - e) / self.kappa + self.theta * self.xi ** 2 * (1 - e) ** 2 / (2 * self.kappa)
+        psi = s2 / m ** 2
+
+        V_next = np.empty_like(V)
+
+        # quadratic scheme V = a (b + Z)^2
+        quad = psi <= self.psi_c
+        inv_psi = 2 / psi[quad]
+        b2 = inv_psi - 1 + np.sqrt(inv_psi * (inv_psi - 1))
+        a = m[quad] / (1 + b2)
+        Z = np.random.normal(size=b2.size) if rng is None else rng.standard_normal(b2.size)
+        V_next[quad] = a * (np.sqrt(b2) + Z) ** 2
+
+        # exponential scheme, point mass at 0 with probability p
+        exp = ~quad
+        p = (psi[exp] - 1) / (psi[exp] + 1)
+        beta = (1 - p) / m[exp]
+        U = np.random.uniform(size=p.size) if rng is None else rng.uniform(size=p.size)
+        V_next[exp] = np.where(U <= p, 0, np.log((1 - p) / np.maximum(1 - U, 1e-300)) / beta)
+
+        return V_next
+
+    def step_log_price(self, X, V, V_next, dt, rng=None):
+        """
+        Advances the log stock price one timestep, central discretisation of the integrated variance
+        :param X: log stock price at time t
+        :param V: variance at time t
+        :param V_next: variance at time t + dt
+        :param dt: delta in time
+        :param rng: numpy Generator to sample with, otherwise samples with np.random
+        :return: log stock price at time t + dt
+        """
+        k0 = -self.rho * self.kappa * self.theta * dt / self.xi
+        k1 = 0.5 * dt * (self.kappa * self.rho / self.xi - 0.5) - self.rho / self.xi
+        k2 = 0.5 * dt * (self.kappa * self.rho / self.xi - 0.5) + self.rho / self.xi
+        k3 = 0.5 * dt * (1 - self.rho ** 2)
+
+        Z = np.random.normal(size=X.size) if rng is None else rng.standard_normal(X.size)
+        return X + self.mu * dt + k0 + k1 * V + k2 * V_next + np.sqrt(k3 * (V + V_next)) * Z
+
+    def simulate(self, n, time, dt, keep_path=False, accumulate=True, rng=None):
+        """
+        Simulates n paths together
+        :param n: number of paths to generate
+        :param time: time to generate samples for
+        :param dt: delta in time
+        :param keep_path: keep every timestep, otherwise only the terminal state and accumulators are kept
+        :param accumulate: compute the average stock price and integrated variance, otherwise they are None
+        :param rng: numpy Generator to sample with, otherwise samples with np.random
+        :return: (stock price, variance, average stock price, integrated variance)
+                 stock price and variance are (timesteps, n) if keep_path else (n)
+        """
+        T = self.get_time_intervals(time, dt)
+        dt = T[1] - T[0]
+
+        X = np.full(n, np.log(self.s0), dtype=float)
+        V = np.full(n, self.v0, dtype=float)
+
+        # per step accumulators
+        S_sum, V_int = (np.exp(X), np.zeros(n)) if accumulate else (None, None)
+
+        if keep_path:
+            S_path = np.empty((T.size, n))
+            V_path = np.empty((T.size, n))
+            S_path[0], V_path[0] = np.exp(X), V
+
+        for i in range(1, T.size):
+            V_next = self.step_variance(V, dt, rng)
+            X = self.step_log_price(X, V, V_next, dt, rng)
+            if accumulate:
+                V_int += 0.5 * (V + V_next) * dt
+            V = V_next
+
+            if accumulate or keep_path:
+                S = np.exp(X)
+            if accumulate:
+                S_sum += S
+            if keep_path:
+                S_path[i], V_path[i] = S, V
+
+        S_avg = S_sum / T.size if accumulate else None
+        if keep_path:
+            return S_path, V_path, S_avg, V_int
+        return np.exp(X), V, S_avg, V_int
+
+    def generate_paths(self, n, time, dt):
+        T = self.get_time_intervals(time, dt)
+        self.path, self.variance_path, _, _ = self.simulate(n, time, dt, keep_path=True)
+        self.T = T
+
+        return self.path
+
+    def generate_terminal(self, n, time, dt, out=None, rng=None):
+        """
+        Generates terminal stock prices, simulated in chunks of chunk_size paths to bound memory
+        Each chunk is written straight into out, so only chunk_size sized temporaries are allocated
+        :param n: number of paths to generate
+        :param time: time to generate samples for
+        :param dt: delta in time
+        :param out: array to write the values into (optional)
+        :param rng: numpy Generator to sample with, otherwise samples with np.random
+        :return: stock price at time (array, 1 for each path)
+        """
+        if out is None:
+            out = np.empty(n)
+
+        for start in range(0, n, self.chunk_size):
+            stop = min(start + self.chunk_size, n)
+            S, _, _, _ = self.simulate(stop - start, time, dt, accumulate=False, rng=rng)
+            out[start:stop] = S
+
+        return out
+
+    def generate_accumulators(self, n, time, dt, rng=None):
+        """
+        Generates terminal states and per-step accumulators, simulated in chunks of chunk_size paths
+        :param n: number of paths to generate
+        :param time: time to generate samples for
+        :param dt: delta in time
+        :param rng: numpy Generator to sample with, otherwise samples with np.random
+        :return: (terminal stock price, terminal variance, average stock price, integrated variance)
+        """
+        chunks = [self.simulate(min(self.chunk_size, n - start), time, dt, rng=rng)
+                  for start in range(0, n, self.chunk_size)]
+        return tuple(np.concatenate(values) for values in zip(*chunks))
+
+
+if __name__ == "__main__":
+    heston = Heston(0.03, 2, 0.04, 0.5, -0.7, 0.04, 100)
+    heston.generate_paths(100, 1, 1 / 250)
+    heston.plot()
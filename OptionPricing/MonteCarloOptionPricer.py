@@ -1,3 +1,5 @@
+import copy
+
 import numpy as np
 
 from FinancialModels.GeometricBrownianMotion import GBM
@@ -9,30 +11,153 @@ class MonteCarloOptionPricer(OptionPricer):
     """
     Prices options using
     """
-    def __init__(self, mu, n, dt):
+    def __init__(self, mu, n, dt, model=None, dtype=None, chunk_size=4096, seed=None):
         """
         Initialises a MC option pricer
         :param mu: the drift term
         :param n: number of samples
         :param dt: time delta
+        :param model: a FinancialModel to simulate instead of a GBM (its s0 is set to St and its mu to mu when pricing)
+        :param dtype: working dtype of the in place pipeline (e.g. np.float32), None uses the float64 pipeline
+        :param chunk_size: number of samples per payoff chunk in the in place pipeline
+        :param seed: seed of the numpy Generator the in place pipeline passes to the model
         """
+        assert dtype is None or np.dtype(dtype) in (np.float32, np.float64), "dtype must be np.float32 or np.float64"
+
         self.mu = mu
         self.n = n
         self.dt = dt
+        self.model = model
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+
+        # scratch buffers reused by price_in_place
+        self.buffers = {}
+        self.rng = np.random.default_rng(seed)
 
+    def get_model(self, St, sigma):
+        """
+        :param St: Stock price at time t
+        :param sigma: volatility of the option, only used by the default GBM (a supplied model keeps its own volatility)
+        :return: the model to simulate, starting at St with drift mu
+        """
+        if self.model is None:
+            return GBM(self.mu, sigma, St)
+
+        model = copy.copy(self.model)
+        model.s0 = St
+        model.mu = self.mu
+        return model
+
+    def get_buffer(self, name, shape, dtype):
+        """
+        Returns a scratch buffer, only allocated when the shape or dtype changes
+        :param name: name of the buffer
+        :param shape: shape of the buffer
+        :param dtype: dtype of the buffer
+        :return: the buffer (contents are undefined)
+        """
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buffer
+        return buffer
 
     def price(self, t, St, r, option):
-        T, K, sigma = option.get_params()
-        gbm = GBM(self.mu, sigma, St)
-        stock_price = gbm.generate_paths(self.n, T-t, self.dt)
-        payoffs = option.get_option_payoff(stock_price[-1, :]).mean(axis=1)
-        discounted = np.exp(-r * (T - t)) * payoffs
+        if self.dtype is not None:
+            return self.price_in_place(t, St, r, option)
+
+        payoffs, discount = self.simulate_payoffs(t, St, r, option)
+        discounted = discount * payoffs.mean(axis=1)
         return discounted
 
+    def simulate_payoffs(self, t, St, r, option):
+        """
+        Simulates the payoffs of the float64 pipeline
+        :param t: time to price at
+        :param St: Stock price at time t
+        :param r: interest rate at time t
+        :param option: the option to price
+        :return: (payoff of each sample, (K.size, n)), discount factor
+        """
+        T, K, sigma = option.get_params()
+        model = self.get_model(St, sigma)
+        stock_price = model.generate_terminal(self.n, T-t, self.dt)
+        payoffs = option.get_option_payoff(stock_price)
+        return payoffs, np.exp(-r * (T - t))
+
+    def price_in_place(self, t, St, r, option):
+        """
+        Prices the option simulating in self.dtype, chunk sums are accumulated in float64
+        Payoff, mean and discount are computed in place over the scratch buffers, chunk_size samples at a time
+        Models write terminal prices straight into the stock price buffer (Heston allocates chunk sized temporaries)
+        :param t: time to price at
+        :param St: Stock price at time t
+        :param r: interest rate at time t
+        :param option: the option to price
+        :return: the price of the option at time t
+        """
+        T, K, sigma = option.get_params()
+        n_strikes = np.size(K)
+        chunk_size = min(self.chunk_size, self.n)
+
+        stock_price = self.get_buffer("stock_price", (self.n,), self.dtype)
+        payoffs = self.get_buffer("payoffs", (n_strikes, chunk_size), self.dtype)
+        chunk_sum = self.get_buffer("chunk_sum", (n_strikes,), self.dtype)
+        total = self.get_buffer("total", (n_strikes,), np.float64)
+
+        model = self.get_model(St, sigma)
+        model.generate_terminal(self.n, T - t, self.dt, out=stock_price, rng=self.rng)
+
+        total.fill(0)
+        for start in range(0, self.n, chunk_size):
+            chunk = stock_price[start:start + chunk_size]
+            chunk_payoffs = payoffs[:, :chunk.size]
+            option.write_option_payoff(chunk, chunk_payoffs)
+            # pairwise sum within the chunk, float64 across chunks
+            np.add.reduce(chunk_payoffs, axis=1, out=chunk_sum)
+            total += chunk_sum
+
+        # mean and discount
+        total *= np.exp(-r * (T - t)) / self.n
+
+        if np.ndim(K) == 0:
+            return total[0]
+        return total.copy()
+
+    def accuracy_report(self, t, St, r, option, seed=0):
+        """
+        Measures the error of the self.dtype pipeline, sampled with its own Generator, against the float64
+        pipeline (dtype=None) sampled with np.random, next to the MC standard error of the float64 price
+        Both use the same seed but different samplers, so the error includes MC noise and any precision
+        effects on sampling, an error within a few standard errors is indistinguishable from MC noise
+        :param t: time to price at
+        :param St: Stock price at time t
+        :param r: interest rate at time t
+        :param option: the option to price
+        :param seed: seed of both samplers, the state of np.random is restored afterwards
+        :return: (self.dtype prices, float64 prices, absolute errors, standard errors), one per strike
+        """
+        dtype = self.dtype if self.dtype is not None else np.float64
+        pricer = MonteCarloOptionPricer(self.mu, self.n, self.dt, self.model, dtype, self.chunk_size, seed)
+        low = np.reshape(pricer.price(t, St, r, option), -1)
 
+        reference = MonteCarloOptionPricer(self.mu, self.n, self.dt, self.model)
+        state = np.random.get_state()
+        np.random.seed(seed)
+        payoffs, discount = reference.simulate_payoffs(t, St, r, option)
+        np.random.set_state(state)
+
+        payoffs = np.reshape(payoffs, (-1, self.n))
+        high = discount * payoffs.mean(axis=1)
+        std_error = discount * payoffs.std(axis=1, ddof=1) / np.sqrt(self.n)
+
+        return low, high, np.abs(low - high), std_error
 
 
 if __name__ == "__main__":
+    from FinancialModels.Heston import Heston
+
     T = 15
     t = 0
     St = 300
@@ -50,3 +175,15 @@ if __name__ == "__main__":
 
     callOption.plot_price([K, K], [Cprice, Pprice], ["Call Option", "Put Option"], x_label="Strike Price ($)", title="Strike price vs option price")
 
+    pricer = MonteCarloOptionPricer(mu, 20000, 0.01, dtype=np.float32)
+    _, _, abs_error, std_error = pricer.accuracy_report(t, St, r, callOption)
+    print(f"float32 vs float64 call prices - max abs error: ${abs_error.max():.4f}, "
+          f"max standard error: ${std_error.max():.4f}, max error / standard error: {(abs_error / np.maximum(std_error, 1e-12)).max():.2f}")
+
+    heston = Heston(mu, 2, sigma ** 2, 0.5, -0.7, sigma ** 2)
+    pricer = MonteCarloOptionPricer(mu, 10000, 0.01, model=heston)
+    Cprice = pricer.price(t, St, r, callOption)
+    Pprice = pricer.price(t, St, r, putOption)
+
+    callOption.plot_price([K, K], [Cprice, Pprice], ["Call Option", "Put Option"], x_label="Strike Price ($)", title="Strike price vs option price under Heston")
+
@@ -49,26 +49,48 @@ class CallOption(FinancialOption):
         super().__init__(T, K, sigma)
 
     def get_option_payoff(self, stock_price):
-        if type(stock_price) == float or type(self.K) == float:
+        if type(stock_price) == float or np.ndim(self.K) == 0:
             return np.maximum(stock_price - self.K, 0)
         else:
             Ks = np.repeat(self.K[..., np.newaxis], stock_price.size, axis=1)
             Sts = np.repeat(stock_price[np.newaxis, ...], self.K.size, axis=0)
             return np.maximum(Sts - Ks, 0)
 
+    def write_option_payoff(self, stock_price, out):
+        """
+        Writes max(St - K, 0) into out without allocating
+        :param stock_price: array of stock prices
+        :param out: (K.size, stock_price.size) array
+        :return: out
+        """
+        Ks = np.reshape(self.K, (-1, 1)).astype(out.dtype, copy=False)
+        np.subtract(stock_price, Ks, out=out)
+        return np.maximum(out, 0, out=out)
+
 
 class PutOption(FinancialOption):
     def __init__(self, T, K, sigma):
         super().__init__(T, K, sigma)
 
     def get_option_payoff(self, stock_price):
-        if type(stock_price) == float or type(self.K) == float:
+        if type(stock_price) == float or np.ndim(self.K) == 0:
             return np.maximum(self.K - stock_price, 0)
         else:
             Ks = np.repeat(self.K[..., np.newaxis], stock_price.size, axis=1)
             Sts = np.repeat(stock_price[np.newaxis, ...], self.K.size, axis=0)
             return np.maximum(Ks - Sts, 0)
 
+    def write_option_payoff(self, stock_price, out):
+        """
+        Writes max(K - St, 0) into out without allocating
+        :param stock_price: array of stock prices
+        :param out: (K.size, stock_price.size) array
+        :return: out
+        """
+        Ks = np.reshape(self.K, (-1, 1)).astype(out.dtype, copy=False)
+        np.subtract(Ks, stock_price, out=out)
+        return np.maximum(out, 0, out=out)
+
 
 if __name__ == "__main__":
     T = 1